@@ -6,61 +6,99 @@ It provides structured data about function signatures, arguments, return types,
 """
 
 import ast
+import mmap
 import os
-from typing import List, Dict, Union, Optional
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, List, Dict, Union, Optional, Tuple
 
-class ParentAssigner(ast.NodeVisitor):
-    """Add parent references to AST nodes"""
-    def visit(self, node: ast.AST) -> None:
-        for child in ast.iter_child_nodes(node):
-            child.parent = node  # type: ignore
-            self.visit(child)
+# dataclass(slots=True) needs Python 3.10+; older interpreters get regular dataclasses
+_RECORD_OPTIONS = {"frozen": True, "slots": True} if sys.version_info >= (3, 10) else {"frozen": True}
 
-def extract_function_info(node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> Dict[str, Union[str, List, None]]:
+class _Record:
+    __slots__ = ()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Plain-dict copy for JSON serialization"""
+        return asdict(self)
+
+@dataclass(**_RECORD_OPTIONS)
+class ArgInfo(_Record):
+    name: str
+    type: Optional[str]
+    is_vararg: bool = False
+    is_kwarg: bool = False
+
+@dataclass(**_RECORD_OPTIONS)
+class FunctionInfo(_Record):
+    name: str
+    args: Tuple[ArgInfo, ...]
+    return_type: Optional[str]
+    docstring: Optional[str]
+    start_line: int
+    end_line: Optional[int]
+    is_async: bool
+
+@dataclass(**_RECORD_OPTIONS)
+class ClassInfo(_Record):
+    name: str
+    bases: Tuple[str, ...]
+    docstring: Optional[str]
+    methods: Tuple[FunctionInfo, ...]
+    start_line: int
+    end_line: Optional[int]
+
+# Anything a test can be generated for: a function, a method or a method-less class
+ParsedItem = Union[FunctionInfo, ClassInfo]
+
+def _unparse(node: Optional[ast.AST]) -> Optional[str]:
+    """ast.unparse with fast paths for bare names (`int`, `str`) and simple constants (`None`, `"Foo"`)"""
+    if node is None:
+        return None
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, type(None))):
+        return repr(node.value)
+    return ast.unparse(node)
+
+def _arg_bare(arg: ast.arg) -> ArgInfo:
+    """Argument without an annotation: the common case, no unparse needed"""
+    return ArgInfo(arg.arg, None)
+
+def _arg_typed(arg: ast.arg) -> ArgInfo:
+    """Argument name and unparsed type annotation"""
+    return ArgInfo(arg.arg, _unparse(arg.annotation))
+
+def extract_function_info(node: Union[ast.FunctionDef, ast.AsyncFunctionDef]) -> FunctionInfo:
     """
     Extract function information, including complex argument types and variable arguments.
     """
-    def extract_arg_info(arg: ast.arg) -> Dict[str, Optional[str]]:
-        """Helper to extract argument name and type annotation"""
-        return {
-            "name": arg.arg,
-            "type": ast.unparse(arg.annotation) if arg.annotation else None
-        }
-
     # Extract positional arguments
-    args = [extract_arg_info(arg) for arg in node.args.args]
+    args = [(_arg_typed if arg.annotation else _arg_bare)(arg) for arg in node.args.args]
     
     # Extract variable positional arguments (*args)
     if node.args.vararg:
-        args.append({
-            "name": node.args.vararg.arg,
-            "type": ast.unparse(node.args.vararg.annotation) if node.args.vararg.annotation else None,
-            "is_vararg": True
-        })
+        args.append(ArgInfo(node.args.vararg.arg, _unparse(node.args.vararg.annotation), is_vararg=True))
     
     # Extract keyword-only arguments
-    for arg in node.args.kwonlyargs:
-        args.append(extract_arg_info(arg))
+    args.extend((_arg_typed if arg.annotation else _arg_bare)(arg) for arg in node.args.kwonlyargs)
     
     # Extract variable keyword arguments (**kwargs)
     if node.args.kwarg:
-        args.append({
-            "name": node.args.kwarg.arg,
-            "type": ast.unparse(node.args.kwarg.annotation) if node.args.kwarg.annotation else None,
-            "is_kwarg": True
-        })
-
-    return {
-        "name": node.name,
-        "args": args,
-        "return_type": ast.unparse(node.returns) if node.returns else None,
-        "docstring": ast.get_docstring(node),
-        "start_line": node.lineno,
-        "end_line": node.end_lineno,
-        "is_async": isinstance(node, ast.AsyncFunctionDef)
-    }
-
-def extract_class_info(node: ast.ClassDef) -> Dict[str, Union[str, List, None]]:
+        args.append(ArgInfo(node.args.kwarg.arg, _unparse(node.args.kwarg.annotation), is_kwarg=True))
+
+    return FunctionInfo(
+        name=node.name,
+        args=tuple(args),
+        return_type=_unparse(node.returns),
+        docstring=ast.get_docstring(node),
+        start_line=node.lineno,
+        end_line=node.end_lineno,
+        is_async=isinstance(node, ast.AsyncFunctionDef)
+    )
+
+def extract_class_info(node: ast.ClassDef) -> ClassInfo:
     """
     Extract detailed information from a class definition node.
     
@@ -68,67 +106,94 @@ def extract_class_info(node: ast.ClassDef) -> Dict[str, Union[str, List, None]]:
         node (ast.ClassDef): AST node representing a class definition
         
     Returns:
-        Dictionary containing:
+        ClassInfo containing:
         - name: Class name
-        - bases: List of base classes
+        - bases: Base classes
         - docstring: Class docstring
-        - methods: List of class methods
+        - methods: Class methods, sync and async
         - start_line: Starting line number
         - end_line: Ending line number
     """
-    methods = []
-    for item in node.body:
-        if isinstance(item, ast.FunctionDef):
-            methods.append(extract_function_info(item))
-
-    return {
-        "name": node.name,
-        "bases": [ast.unparse(base) for base in node.bases],
-        "docstring": ast.get_docstring(node),
-        "methods": methods,
-        "start_line": node.lineno,
-        "end_line": node.end_lineno
-    }
+    methods = tuple(
+        extract_function_info(item)
+        for item in node.body
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+    )
+
+    return ClassInfo(
+        name=node.name,
+        bases=tuple(_unparse(base) for base in node.bases),
+        docstring=ast.get_docstring(node),
+        methods=methods,
+        start_line=node.lineno,
+        end_line=node.end_lineno
+    )
+
+def parse_python_source(source: Union[bytes, str], filename: str) -> Dict[str, List]:
+    """Parse in-memory source, collecting top-level functions and classes in a single pass"""
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError as e:
+        raise SyntaxError(f"Syntax error in {filename} at line {e.lineno}: {e.msg}") from e
+
+    analysis_result = {"functions": [], "classes": []}
+
+    # Methods are collected from each ClassDef body, so only module-level nodes need visiting
+    for node in tree.body:
+        # Handle both regular and async functions
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            analysis_result["functions"].append(extract_function_info(node))
+
+        # Handle class definitions
+        elif isinstance(node, ast.ClassDef):
+            analysis_result["classes"].append(extract_class_info(node))
+
+    return analysis_result
 
 def parse_python_file(file_path: str) -> Dict[str, List]:
-    """Main parsing function with parent tracking"""
+    """Main parsing function: reads the file and delegates to parse_python_source"""
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
     full_path = os.path.abspath(file_path)
 
-    with open(full_path, "r", encoding="utf-8") as source_file:
+    with open(full_path, "rb") as source_file:
+        # Hand the mapped bytes straight to the tokenizer instead of decoding to str first
         try:
-            tree = ast.parse(source_file.read(), filename=full_path)
-        except SyntaxError as e:
-            raise SyntaxError(f"Syntax error in {full_path} at line {e.lineno}: {e.msg}") from e
+            source = mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return parse_python_source(source_file.read(), full_path)
+        with source:
+            return parse_python_source(source, full_path)
 
-    # Add parent references to all nodes
-    ParentAssigner().visit(tree)
+# Process startup outweighs the parsing work for a handful of files
+_PARALLEL_PARSE_MIN_FILES = 4
 
-    analysis_result = {"functions": [], "classes": []}
+def _parse_worker_count(file_count: int, workers: Optional[int] = None) -> int:
+    return min(file_count, workers or os.cpu_count() or 1)
 
-    for node in ast.walk(tree):
-        # Handle both regular and async functions
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            # Check if parent is a ClassDef
-            if not isinstance(getattr(node, 'parent', None), ast.ClassDef):
-                analysis_result["functions"].append(extract_function_info(node))
-        
-        # Handle class definitions
-        elif isinstance(node, ast.ClassDef):
-            methods = [
-                extract_function_info(child) 
-                for child in node.body 
-                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef))
-            ]
-            analysis_result["classes"].append({
-                "name": node.name,
-                "bases": [ast.unparse(base) for base in node.bases],
-                "docstring": ast.get_docstring(node),
-                "methods": methods,
-                "start_line": node.lineno,
-                "end_line": node.end_lineno
-            })
-
-    return analysis_result
\ No newline at end of file
+def create_parse_executor(file_count: int, workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """Worker pool for parsing `file_count` files, or None when parsing them serially is cheaper"""
+    if file_count < _PARALLEL_PARSE_MIN_FILES:
+        return None
+    return ProcessPoolExecutor(max_workers=_parse_worker_count(file_count, workers))
+
+def parse_python_files(paths: List[str], workers: Optional[int] = None) -> Dict[str, Dict[str, List]]:
+    """
+    Parse several Python files, sharding them across worker processes.
+
+    Args:
+        paths (List[str]): Source files to parse
+        workers (Optional[int]): Worker process count (default: os.cpu_count())
+
+    Returns:
+        Dictionary mapping each path to its parse_python_file result
+    """
+    executor = create_parse_executor(len(paths), workers)
+    if executor is None:
+        return {path: parse_python_file(path) for path in paths}
+
+    chunksize = max(1, len(paths) // (_parse_worker_count(len(paths), workers) * 4))
+    with executor:
+        return dict(zip(paths, executor.map(parse_python_file, paths, chunksize=chunksize)))
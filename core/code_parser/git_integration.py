@@ -1,18 +1,38 @@
 import os
 import subprocess
 from pathlib import Path
+from typing import List, Optional
 
-def track_generated_tests():
-    """Automatically add, commit, and push generated test cases."""
+def _changed_test_files(test_dir: Path) -> List[str]:
+    """List untracked or modified generated test files with a single git call."""
+    result = subprocess.run(
+        ["git", "ls-files", "--others", "--modified", "--exclude-standard", "--", str(test_dir)],
+        capture_output=True, text=True, check=False
+    )
+    # A file that is both modified and deleted is listed twice
+    return list(dict.fromkeys(line for line in result.stdout.splitlines() if line))
+
+def track_generated_tests() -> Optional[subprocess.Popen]:
+    """Automatically add, commit, and push generated test cases.
+
+    Returns the running `git push` process so the caller can continue while it completes.
+    """
     test_dir = Path("tests/unit")
     if not test_dir.exists():
         print("❌ Test directory does not exist. Skipping Git commit.")
-        return
-    
-    # Run git commands
-    subprocess.run(["git", "add", str(test_dir)], check=False)
-    subprocess.run(["git", "commit", "-m", "🔍 Auto-generated test cases"], check=False)
-    subprocess.run(["git", "push"], check=False)
+        return None
+
+    new_files = _changed_test_files(test_dir)
+    if not new_files:
+        print("No new generated tests to commit.")
+        return None
+
+    # Explicit pathspecs avoid re-statting the whole test directory
+    subprocess.run(["git", "add", "--", *new_files], check=False)
+    subprocess.run(["git", "commit", "-m", "🔍 Auto-generated test cases", "--", *new_files], check=False)
+    return subprocess.Popen(["git", "push"])
 
 if __name__ == "__main__":
-    track_generated_tests()
\ No newline at end of file
+    push = track_generated_tests()
+    if push is not None:
+        push.wait()
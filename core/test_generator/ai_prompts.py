@@ -1,7 +1,11 @@
 import json
-from typing import Dict, List
+import functools
+import string
+from typing import Dict, Optional, Sequence, Tuple
 from pathlib import Path
+from core.code_parser.ast_parser import ArgInfo, FunctionInfo
 
+@functools.lru_cache(maxsize=None)
 def load_prompt_template(template_name: str) -> str:
     template_path = Path("prompts") / template_name
     if not template_path.exists():
@@ -9,53 +13,74 @@ def load_prompt_template(template_name: str) -> str:
     with open(template_path, "r") as f:
         return f.read()
 
-def generate_unit_test_prompt(function_info: Dict) -> str:
-    function_name = function_info["name"]
-    args = function_info["args"]
-    return_type = function_info["return_type"]
-    docstring = function_info["docstring"]
-    arg_descriptions = []
-    for arg in args:
-        arg_name = arg["name"]
-        arg_type = arg["type"]
-        is_vararg = arg.get("is_vararg", False)
-        is_kwarg = arg.get("is_kwarg", False)
-        if is_vararg:
-            arg_descriptions.append(f"*{arg_name}: {arg_type} (variable-length arguments)")
-        elif is_kwarg:
-            arg_descriptions.append(f"**{arg_name}: {arg_type} (keyword arguments)")
+@functools.lru_cache(maxsize=None)
+def _compile_prompt_template(template_name: str) -> Optional[Tuple[Tuple[str, Optional[str]], ...]]:
+    """Split a template into (literal, field) segments once so rendering skips format-string parsing"""
+    segments = tuple(string.Formatter().parse(load_prompt_template(template_name)))
+    if any(conversion or format_spec for _, _, format_spec, conversion in segments):
+        # Conversions and format specs need str.format itself
+        return None
+    return tuple((literal, field_name) for literal, field_name, _, _ in segments)
+
+def render_prompt_template(template_name: str, **values) -> str:
+    segments = _compile_prompt_template(template_name)
+    if segments is None:
+        return load_prompt_template(template_name).format(**values)
+    return "".join([literal if field is None else literal + str(values[field]) for literal, field in segments])
+
+_ARG_PLAIN, _ARG_VARARG, _ARG_KWARG = 0, 1, 2
+
+@functools.lru_cache(maxsize=4096)
+def _format_args(names: Tuple[str, ...], types: Tuple[Optional[str], ...], flags: Tuple[int, ...]) -> str:
+    descriptions = []
+    for name, arg_type, flag in zip(names, types, flags):
+        if flag == _ARG_VARARG:
+            descriptions.append(f"*{name}: {arg_type} (variable-length arguments)")
+        elif flag == _ARG_KWARG:
+            descriptions.append(f"**{name}: {arg_type} (keyword arguments)")
         else:
-            arg_descriptions.append(f"{arg_name}: {arg_type}")
-    template = load_prompt_template("unit_test_template.txt")
-    prompt = template.format(
+            descriptions.append(f"{name}: {arg_type}")
+    return ", ".join(descriptions)
+
+def _arg_signature(args: Sequence[ArgInfo]) -> Tuple[Tuple[str, ...], Tuple[Optional[str], ...], Tuple[int, ...]]:
+    """Hashable (names, types, flags) form of an argument list"""
+    return (
+        tuple(arg.name for arg in args),
+        tuple(arg.type for arg in args),
+        tuple(_ARG_VARARG if arg.is_vararg else _ARG_KWARG if arg.is_kwarg else _ARG_PLAIN for arg in args)
+    )
+
+def format_arguments(args: Sequence[ArgInfo]) -> str:
+    # Repeated signatures hit the cache on the (names, types, flags) key
+    return _format_args(*_arg_signature(args))
+
+@functools.lru_cache(maxsize=4096)
+def _render_unit_test_prompt(function_name: str, signature: Tuple[Tuple, Tuple, Tuple], return_type: Optional[str], docstring: Optional[str]) -> str:
+    return render_prompt_template(
+        "unit_test_template.txt",
         function_name=function_name,
-        arguments=", ".join(arg_descriptions),
+        arguments=_format_args(*signature),
         return_type=return_type,
         docstring=docstring if docstring else "No docstring available."
     )
-    return prompt
 
-def generate_integration_test_prompt(function_info: Dict, dependencies: List[str]) -> str:
-    function_name = function_info["name"]
-    args = function_info["args"]
-    return_type = function_info["return_type"]
-    docstring = function_info["docstring"]
-    arg_descriptions = []
-    for arg in args:
-        arg_name = arg["name"]
-        arg_type = arg["type"]
-        is_vararg = arg.get("is_vararg", False)
-        is_kwarg = arg.get("is_kwarg", False)
-        if is_vararg:
-            arg_descriptions.append(f"*{arg_name}: {arg_type} (variable-length arguments)")
-        elif is_kwarg:
-            arg_descriptions.append(f"**{arg_name}: {arg_type} (keyword arguments)")
-        else:
-            arg_descriptions.append(f"{arg_name}: {arg_type}")
-    template = load_prompt_template("integration_test_template.txt")
-    prompt = template.format(
+def generate_unit_test_prompt(function_info: FunctionInfo) -> str:
+    # Functions with the same name and shape (e.g. __repr__ across classes) render once
+    return _render_unit_test_prompt(
+        function_info.name,
+        _arg_signature(function_info.args),
+        function_info.return_type,
+        function_info.docstring
+    )
+
+def generate_integration_test_prompt(function_info: FunctionInfo, dependencies: Sequence[str]) -> str:
+    function_name = function_info.name
+    return_type = function_info.return_type
+    docstring = function_info.docstring
+    prompt = render_prompt_template(
+        "integration_test_template.txt",
         function_name=function_name,
-        arguments=", ".join(arg_descriptions),
+        arguments=format_arguments(function_info.args),
         return_type=return_type,
         docstring=docstring if docstring else "No docstring available.",
         dependencies=", ".join(dependencies)
@@ -67,8 +92,8 @@ def generate_ui_test_prompt(ui_element_info: Dict) -> str:
     element_xpath = ui_element_info.get("xpath", "N/A")
     element_name = ui_element_info.get("name", "N/A")
     dependencies = ui_element_info.get("dependencies", "None")
-    template = load_prompt_template("ui_test_template.txt")
-    prompt = template.format(
+    prompt = render_prompt_template(
+        "ui_test_template.txt",
         element_id=element_id,
         element_xpath=element_xpath,
         element_name=element_name,
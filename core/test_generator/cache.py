@@ -0,0 +1,59 @@
+import time
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+try:
+    import blake3
+except ImportError:  # Optional: fall back to hashlib's SHA-256
+    blake3 = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".ai-test-gen" / "llm_cache.sqlite"
+DEFAULT_TTL_SECONDS = 14 * 24 * 60 * 60
+
+def content_hash(data: bytes) -> str:
+    """Hex digest for cache keys: BLAKE3 when installed, SHA-256 otherwise"""
+    if blake3 is not None:
+        return blake3.blake3(data).hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+class ResponseCache:
+    """SQLite-backed store of model responses keyed by (model, prompt)"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Batch API runs use the cache from a worker thread; calls never overlap
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets concurrent CLI invocations read while another one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses(key TEXT PRIMARY KEY, response TEXT, created REAL)")
+        with self._conn:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        return content_hash(f"{model}\x00{prompt}".encode("utf-8"))
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """Return the cached response, or None when missing or expired"""
+        row = self._conn.execute(
+            "SELECT response FROM responses WHERE key = ? AND created >= ?",
+            (self.make_key(model, prompt), time.time() - self.ttl_seconds)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, model: str, prompt: str, response: str) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses(key, response, created) VALUES (?, ?, ?)",
+                (self.make_key(model, prompt), response, time.time())
+            )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,55 +1,339 @@
-import os
 import re
+import json
+import asyncio
 import hashlib
+import functools
+import importlib.util
+import logging
+import time
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import List, Optional, Set, Tuple
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import APIConnectionError, AsyncOpenAI, ConflictError, InternalServerError, OpenAI, RateLimitError
 from config.settings import OPENAI_API_KEY
+from core.code_parser.ast_parser import ParsedItem
 from core.test_generator.ai_prompts import generate_unit_test_prompt
+from .cache import ResponseCache
 from .validation import validate_test_case, log_validation_errors
 
 load_dotenv()
-client = OpenAI(api_key=OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
+
+_SYSTEM_PROMPT = "You are a helpful assistant that generates Python unit tests."
+
+_PACKED_INSTRUCTIONS = (
+    "Complete every numbered task below independently. Respond with a JSON object of the form "
+    '{"tests": [{"index": <task number>, "code": "<complete Python test module>"}]} '
+    "containing exactly one entry per task.\n\n"
+)
+
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+# Accepts CRLF line endings and tags such as ```python3
+_FENCE_RE = re.compile(r"\A```(?:python\w*)?\r?\n(.*)\r?\n```\Z", re.DOTALL)
+
+# Keyed on the code string itself: its hash is cached on the object, so the caller
+# reporting the filename gets the digest computed during finalization for free
+@functools.lru_cache(maxsize=1024)
+def _content_digest(test_code: str) -> bytes:
+    """16-byte BLAKE2b digest of generated test code, used for dedup and filenames"""
+    return hashlib.blake2b(test_code.encode("utf-8"), digest_size=16).digest()
+
+# Connection pools sized for concurrent batch generation
+_POOL_LIMITS = {"max_connections": 32, "max_keepalive_connections": 16}
+_HTTP_TIMEOUT = 30.0
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> OpenAI:
+    """Create the synchronous OpenAI client on first use and reuse its connection pool"""
+    import httpx
+    return OpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=httpx.Client(limits=httpx.Limits(**_POOL_LIMITS), timeout=_HTTP_TIMEOUT)
+    )
+
+# The async client's connection pool is bound to the event loop that created it
+_async_client: Optional[Tuple[asyncio.AbstractEventLoop, AsyncOpenAI]] = None
+
+def _get_async_client() -> AsyncOpenAI:
+    """Lazily create an AsyncOpenAI client for the running event loop"""
+    global _async_client
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client[0] is not loop:
+        import httpx
+        # HTTP/2 multiplexes concurrent requests over one connection when the h2 extra is installed
+        http2 = importlib.util.find_spec("h2") is not None
+        http_client = httpx.AsyncClient(limits=httpx.Limits(**_POOL_LIMITS), timeout=_HTTP_TIMEOUT, http2=http2)
+        # Retries are handled by TestGenerator._create_completion
+        _async_client = (loop, AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0))
+    return _async_client[1]
+
+async def close_async_client() -> None:
+    """Close the running loop's AsyncOpenAI client so its connection pool does not outlive the loop"""
+    global _async_client
+    if _async_client is not None and _async_client[0] is asyncio.get_running_loop():
+        client = _async_client[1]
+        _async_client = None
+        await client.close()
+
+def _run_with_client(coro):
+    """asyncio.run that closes the loop-bound client before the loop is torn down"""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+    return asyncio.run(runner())
+
+# Exponential backoff for transient API failures: 4s, 8s, 16s, then capped at 30s.
+# Covers what the SDK's own retries (disabled on the client) handled: 409, 429, 5xx,
+# connection errors and timeouts (APITimeoutError subclasses APIConnectionError)
+_RETRYABLE_ERRORS = (RateLimitError, InternalServerError, ConflictError, APIConnectionError)
+_MAX_ATTEMPTS = 5
+_BACKOFF_MIN = 4.0
+_BACKOFF_MAX = 30.0
+
+class RateLimiter:
+    """Spaces request starts evenly so at most `requests_per_minute` begin per minute"""
+    def __init__(self, requests_per_minute: int):
+        if requests_per_minute <= 0:
+            raise ValueError(f"requests_per_minute must be positive, got {requests_per_minute}")
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        # Reserve the slot before sleeping so concurrent callers queue behind it
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
 
 class TestGenerator:
-    def __init__(self, output_dir: str = "tests/unit"):
+    def __init__(self, output_dir: str = "tests/unit", cache: Optional[ResponseCache] = None, requests_per_minute: Optional[int] = None):
         self.output_dir = output_dir
-        os.makedirs(self.output_dir, exist_ok=True)
+        self._output_path = Path(output_dir)
+        self.cache = cache
+        self.rate_limiter = RateLimiter(requests_per_minute) if requests_per_minute is not None else None
+        self._output_path.mkdir(parents=True, exist_ok=True)
+        # Digests of tests already written by this generator
+        self._seen: Set[bytes] = set()
+
+    def generate_test_case(self, function_info: ParsedItem, *, prompt_override: Optional[str] = None, model: str = "gpt-3.5-turbo") -> Tuple[bool, Optional[str]]:
+        return _run_with_client(self.async_generate_test_case(function_info, prompt_override=prompt_override, model=model))
+
+    def generate_test_cases_batch(self, function_infos: List[ParsedItem], model: str = "gpt-3.5-turbo", prompt_overrides: Optional[List[Optional[str]]] = None, max_concurrency: int = 8) -> List[Tuple[bool, Optional[str]]]:
+        """Generate tests for many functions concurrently; results keep the input order"""
+        if prompt_overrides is None:
+            prompt_overrides = [None] * len(function_infos)
+        return _run_with_client(self._agenerate_batch(function_infos, model, prompt_overrides, max_concurrency))
+
+    async def _agenerate_batch(self, function_infos: List[ParsedItem], model: str, prompt_overrides: List[Optional[str]], max_concurrency: int) -> List[Tuple[bool, Optional[str]]]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(function_info: ParsedItem, prompt_override: Optional[str]) -> Tuple[bool, Optional[str]]:
+            async with semaphore:
+                return await self.async_generate_test_case(function_info, prompt_override=prompt_override, model=model)
 
-    def generate_test_case(self, function_info: Dict, model: str = "gpt-3.5-turbo", prompt_override: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        outcomes = await asyncio.gather(
+            *(bounded(fi, po) for fi, po in zip(function_infos, prompt_overrides)),
+            return_exceptions=True
+        )
+        results: List[Tuple[bool, Optional[str]]] = []
+        for function_info, outcome in zip(function_infos, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error generating test for {function_info.name}: {outcome}")
+                results.append((False, None))
+            else:
+                results.append(outcome)
+        return results
+
+    async def async_generate_test_case(self, function_info: ParsedItem, *, prompt_override: Optional[str] = None, model: str = "gpt-3.5-turbo") -> Tuple[bool, Optional[str]]:
         prompt = prompt_override if prompt_override is not None else generate_unit_test_prompt(function_info)
-        response = client.chat.completions.create(
+        if self.cache is not None:
+            cached = self.cache.get(model, prompt)
+            if cached is not None:
+                logger.info(f"Using cached response for {function_info.name}")
+                return self._finalize_test_case(function_info, cached)
+        stream = await self._create_completion(
             model=model,
             messages=[
-                {"role": "system", "content": "You are a helpful assistant that generates Python unit tests."},
+                {"role": "system", "content": _SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=1000
+            max_tokens=1000,
+            stream=True
+        )
+        # Collect streamed deltas and join once, so other requests in a batch progress meanwhile
+        parts: List[str] = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+        response_text = "".join(parts)
+        result = self._finalize_test_case(function_info, response_text)
+        # Only responses that produced a usable test are worth replaying
+        if result[0] and self.cache is not None:
+            self.cache.set(model, prompt, response_text)
+        return result
+
+    async def async_generate_test_cases_packed(self, function_infos: List[ParsedItem], prompts: List[str], model: str = "gpt-3.5-turbo") -> List[Tuple[bool, Optional[str]]]:
+        """Generate tests for several functions with one request; results keep the input order"""
+        results: List[Optional[Tuple[bool, Optional[str]]]] = [None] * len(function_infos)
+        # Only prompts missing from the cache go into the packed request
+        misses: List[int] = []
+        for index, (function_info, prompt) in enumerate(zip(function_infos, prompts)):
+            cached = self.cache.get(model, prompt) if self.cache is not None else None
+            if cached is not None:
+                logger.info(f"Using cached response for {function_info.name}")
+                results[index] = self._finalize_test_case(function_info, cached)
+            else:
+                misses.append(index)
+        if not misses:
+            return results
+
+        tasks = "\n\n".join(f"### Task {task}\n{prompts[index]}" for task, index in enumerate(misses))
+        response = await self._create_completion(
+            model=model,
+            messages=[
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": _PACKED_INSTRUCTIONS + tasks}
+            ],
+            temperature=0.7,
+            response_format={"type": "json_object"}
         )
-        test_code = response.choices[0].message.content.strip()
-        if test_code.startswith("```python") and test_code.endswith("```"):
-            lines = test_code.splitlines()
-            if len(lines) >= 3:
-                test_code = "\n".join(lines[1:-1]).strip()
-        if "<think>" in test_code and "</think>" in test_code:
-            start_think = test_code.find("<think>")
-            end_think = test_code.find("</think>")
-            test_code = (test_code[:start_think] + test_code[end_think+len("</think>"):]).strip()
+        try:
+            entries = json.loads(response.choices[0].message.content).get("tests", [])
+            codes = {int(entry["index"]): entry["code"] for entry in entries}
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.error(f"Malformed packed response for {len(misses)} tasks: {e}")
+            codes = {}
+        for task, index in enumerate(misses):
+            function_info = function_infos[index]
+            if task not in codes:
+                logger.error(f"Packed response has no test for {function_info.name}")
+                results[index] = (False, None)
+                continue
+            results[index] = self._finalize_test_case(function_info, codes[task])
+            # Each task's code is stored under its own prompt, so it also serves unpacked runs
+            if results[index][0] and self.cache is not None:
+                self.cache.set(model, prompts[index], codes[task])
+        return results
+
+    def generate_test_cases_via_batch_api(self, function_infos: List[ParsedItem], prompts: List[str], model: str = "gpt-3.5-turbo", poll_interval: float = 30.0) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Generate tests through the OpenAI Batch API, blocking until the batch finishes.
+
+        Batches complete within 24 hours at a lower price and without per-minute rate limits,
+        which suits large, latency-tolerant runs such as nightly CI.
+        """
+        results: List[Optional[Tuple[bool, Optional[str]]]] = [None] * len(function_infos)
+        requests = []
+        for index, (function_info, prompt) in enumerate(zip(function_infos, prompts)):
+            cached = self.cache.get(model, prompt) if self.cache is not None else None
+            if cached is not None:
+                results[index] = self._finalize_test_case(function_info, cached)
+                continue
+            requests.append({
+                # The index keeps ids unique and maps each response back to its item
+                "custom_id": f"{index}-{function_info.name}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": [
+                        {"role": "system", "content": _SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.7,
+                    "max_tokens": 1000
+                }
+            })
+
+        if requests:
+            client = _get_client()
+            payload = "\n".join(json.dumps(request) for request in requests).encode("utf-8")
+            input_file = client.files.create(file=("batch_input.jsonl", payload), purpose="batch")
+            batch = client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h")
+            logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                time.sleep(poll_interval)
+                batch = client.batches.retrieve(batch.id)
+            if batch.status != "completed" or batch.output_file_id is None:
+                raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+
+            # The batch is already paid for, so one odd line must not discard the others
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    index = int(entry["custom_id"].split("-", 1)[0])
+                    function_info = function_infos[index]
+                except (ValueError, TypeError, KeyError, IndexError, AttributeError) as e:
+                    logger.error(f"Malformed line in batch {batch.id} output: {e}")
+                    continue
+                response = entry.get("response") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    logger.error(f"Batch request failed for {function_info.name}: {entry.get('error') or response.get('status_code')}")
+                    continue
+                try:
+                    response_text = response["body"]["choices"][0]["message"]["content"]
+                    if not isinstance(response_text, str):
+                        raise TypeError(f"content is {type(response_text).__name__}, not str")
+                except (TypeError, KeyError, IndexError, AttributeError) as e:
+                    logger.error(f"Malformed batch response for {function_info.name}: {e}")
+                    continue
+                results[index] = self._finalize_test_case(function_info, response_text)
+                if results[index][0] and self.cache is not None:
+                    self.cache.set(model, prompts[index], response_text)
+
+        return [result if result is not None else (False, None) for result in results]
+
+    async def _create_completion(self, **kwargs):
+        """Create a chat completion, retrying rate-limit and timeout errors with exponential backoff"""
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                return await _get_async_client().chat.completions.create(**kwargs)
+            except _RETRYABLE_ERRORS as e:
+                if attempt == _MAX_ATTEMPTS:
+                    raise
+                delay = min(_BACKOFF_MAX, _BACKOFF_MIN * 2 ** (attempt - 1))
+                logger.warning(f"OpenAI request failed ({type(e).__name__}), retrying in {delay:.0f}s (attempt {attempt}/{_MAX_ATTEMPTS})")
+                await asyncio.sleep(delay)
+
+    def _finalize_test_case(self, function_info: ParsedItem, response_text: str) -> Tuple[bool, Optional[str]]:
+        """Clean up a model response, then validate and save the resulting test"""
+        test_code = _THINK_RE.sub("", response_text).strip()
+        fence = _FENCE_RE.match(test_code)
+        if fence:
+            test_code = fence.group(1).strip()
+        # An identical body was already validated and written; report success without a new file
+        digest = _content_digest(test_code)
+        if digest in self._seen:
+            logger.info(f"Skipping duplicate test generated for {function_info.name}")
+            return True, None
         is_valid, messages = validate_test_case(test_code, function_info)
         if not is_valid:
             log_validation_errors(test_code, messages)
             return False, None
-        test_filename = self._generate_test_filename(function_info["name"], test_code)
-        self._save_test_case(test_filename, test_code)
+        # The dedup digest doubles as the filename hash, so the code is hashed once
+        test_path = self._output_path / self._filename_from_digest(function_info.name, digest)
+        # Same name and digest means a previous run already wrote this exact body
+        if not test_path.exists():
+            self._save_test_case(test_path.name, test_code)
+        self._seen.add(digest)
         return True, test_code
 
     def _generate_test_filename(self, function_name: str, test_code: str) -> str:
-        hash_id = hashlib.md5(test_code.encode()).hexdigest()[:6]
-        return f"test_{function_name}_{hash_id}.py"
+        return self._filename_from_digest(function_name, _content_digest(test_code))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _filename_from_digest(function_name: str, digest: bytes) -> str:
+        return f"test_{function_name}_{digest[:3].hex()}.py"
 
     def _save_test_case(self, filename: str, test_code: str):
-        filepath = Path(self.output_dir) / filename
-        with open(filepath, "w") as f:
-            f.write(test_code)
\ No newline at end of file
+        # Bytes avoid the text-mode wrapper; line endings are written exactly as generated
+        (self._output_path / filename).write_bytes(test_code.encode("utf-8"))
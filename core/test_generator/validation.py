@@ -1,24 +1,114 @@
 import ast
 import re
-import importlib
-from typing import Tuple, List, Dict
+import importlib.util
+from typing import Tuple, List, Dict, Optional
 import pytest
 import logging
 from pathlib import Path
+from core.code_parser.ast_parser import FunctionInfo
+
+try:
+    import hyperscan
+except ImportError:  # Optional: fall back to the compiled `re` patterns
+    hyperscan = None
 
 logger = logging.getLogger(__name__)
 
+# Patterns are compiled once at import instead of on every validation call
+_DANGEROUS_PATTERNS = [
+    (re.compile(pattern), message)
+    for pattern, message in [
+        (r'(os\.system|subprocess\.run|eval|exec)\s*\(', "Dangerous system call detected"),
+        (r'__import__\s*\(', "Unsafe import detected"),
+        (r'(open|file)\s*\(', "Potential file operation detected")
+    ]
+]
+
+def _build_hyperscan_db():
+    """Compile all dangerous patterns into one Hyperscan database scanned in a single pass"""
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[pattern.pattern.encode() for pattern, _ in _DANGEROUS_PATTERNS],
+        ids=list(range(len(_DANGEROUS_PATTERNS))),
+        elements=len(_DANGEROUS_PATTERNS),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(_DANGEROUS_PATTERNS)
+    )
+    return db
+
+_DANGEROUS_DB = _build_hyperscan_db() if hyperscan is not None else None
+
+def _find_dangerous_patterns(code: str) -> List[int]:
+    """Return the indices into _DANGEROUS_PATTERNS that match the code, in pattern order"""
+    if _DANGEROUS_DB is None:
+        return [i for i, (pattern, _) in enumerate(_DANGEROUS_PATTERNS) if pattern.search(code)]
+    matched = set()
+
+    def on_match(pattern_id, start, end, flags, context):
+        matched.add(pattern_id)
+
+    _DANGEROUS_DB.scan(code.encode("utf-8"), match_event_handler=on_match)
+    return sorted(matched)
+
+_ASSERTION_RE = re.compile("|".join([
+    r'assert\s+',
+    r'pytest\.raises\(\)',
+    r'unittest\.TestCase\.assert'
+]))
+_MOCK_RE = re.compile("|".join([
+    r'@patch\b',
+    r'Mock\(',
+    r'mocker\.patch\b'
+]))
+
 class TestValidator:
-    def __init__(self, test_code: str, function_info: Dict = None):
+    # Module resolution results shared across validator instances
+    _spec_cache: Dict[str, bool] = {}
+
+    def __init__(self, test_code: str, function_info: Optional[FunctionInfo] = None):
         self.test_code = test_code
         self.function_info = function_info
         self.errors: List[str] = []
         self.warnings: List[str] = []
+        # Parse once and share the tree across the AST-based checks
+        self._tree: Optional[ast.Module] = None
+        self._parse_error: Optional[SyntaxError] = None
+        try:
+            self._tree = ast.parse(test_code)
+        except SyntaxError as e:
+            self._parse_error = e
+        self._scanned = False
+        self._imports: List[str] = []
+        self._from_imports: List[Optional[str]] = []
+        self._dangerous_calls: List[str] = []
+        self._funcdefs: List[str] = []
+
+    def _scan_tree(self) -> bool:
+        """Collect imports, call targets and function names in a single walk of the tree"""
+        if self._tree is None:
+            return False
+        if self._scanned:
+            return True
+        for node in ast.walk(self._tree):
+            if isinstance(node, ast.Import):
+                self._imports.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                self._from_imports.append(node.module)
+            elif isinstance(node, ast.Call):
+                if hasattr(node.func, 'id') and node.func.id in ['eval', 'exec']:
+                    self._dangerous_calls.append(node.func.id)
+            elif isinstance(node, ast.FunctionDef):
+                self._funcdefs.append(node.name)
+        self._scanned = True
+        return True
         
     def validate_all(self) -> Tuple[bool, List[str]]:
         """Run all validation checks in sequence"""
+        if not self.validate_syntax():
+            logger.error("Validation failed in validate_syntax")
+            return False, self.errors + self.warnings
+        self._scan_tree()
+
         checks = [
-            self.validate_syntax,
             self.validate_security,
             self.validate_pytest_structure,
             self.validate_test_naming,
@@ -35,41 +125,30 @@ class TestValidator:
 
     def validate_syntax(self) -> bool:
         """Check for basic Python syntax errors"""
-        try:
-            ast.parse(self.test_code)
-            return True
-        except SyntaxError as e:
-            self.errors.append(f"Syntax error: {str(e)}")
+        if self._parse_error is not None:
+            self.errors.append(f"Syntax error: {str(self._parse_error)}")
             return False
+        return True
 
     def validate_security(self) -> bool:
         """Check for dangerous patterns/imports"""
-        dangerous_patterns = [
-            (r'(os\.system|subprocess\.run|eval|exec)\s*\(', "Dangerous system call detected"),
-            (r'__import__\s*\(', "Unsafe import detected"),
-            (r'(open|file)\s*\(', "Potential file operation detected")
-        ]
-        
+        if not self._scan_tree():
+            return False
         safe = True
-        tree = ast.parse(self.test_code)
         
         # AST-based checks
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    if alias.name in ['os', 'subprocess', 'sys']:
-                        self.warnings.append(f"Potentially risky import: {alias.name}")
-            
-            if isinstance(node, ast.Call):
-                if hasattr(node.func, 'id') and node.func.id in ['eval', 'exec']:
-                    self.errors.append(f"Dangerous function call: {node.func.id}")
-                    safe = False
+        for name in self._imports:
+            if name in ['os', 'subprocess', 'sys']:
+                self.warnings.append(f"Potentially risky import: {name}")
+
+        for name in self._dangerous_calls:
+            self.errors.append(f"Dangerous function call: {name}")
+            safe = False
 
         # Regex pattern checks
-        for pattern, message in dangerous_patterns:
-            if re.search(pattern, self.test_code):
-                self.errors.append(message)
-                safe = False
+        for index in _find_dangerous_patterns(self.test_code):
+            self.errors.append(_DANGEROUS_PATTERNS[index][1])
+            safe = False
                 
         return safe
 
@@ -85,11 +164,9 @@ class TestValidator:
 
     def validate_test_naming(self) -> bool:
         """Ensure test functions follow naming conventions"""
-        tree = ast.parse(self.test_code)
-        test_functions = [
-            node for node in ast.walk(tree) 
-            if isinstance(node, ast.FunctionDef) and node.name.startswith('test_')
-        ]
+        if not self._scan_tree():
+            return False
+        test_functions = [name for name in self._funcdefs if name.startswith('test_')]
         
         if not test_functions:
             self.errors.append("No test functions found (missing 'test_' prefix)")
@@ -99,13 +176,7 @@ class TestValidator:
 
     def validate_assertions(self) -> bool:
         """Check for presence of valid assertions"""
-        assertion_patterns = [
-            r'assert\s+',
-            r'pytest\.raises\(\)',
-            r'unittest\.TestCase\.assert'
-        ]
-        
-        if not any(re.search(pattern, self.test_code) for pattern in assertion_patterns):
+        if not _ASSERTION_RE.search(self.test_code):
             self.errors.append("No valid assertions found in test code")
             return False
             
@@ -113,35 +184,26 @@ class TestValidator:
 
     def validate_mocking(self) -> bool:
         """Check if required mocks are present"""
-        if self.function_info and any(arg['type'] == 'Callable' for arg in self.function_info['args']):
-            mock_patterns = [
-                r'@patch\b',
-                r'Mock\(',
-                r'mocker\.patch\b'
-            ]
-            
-            if not any(re.search(pattern, self.test_code) for pattern in mock_patterns):
+        if self.function_info and any(arg.type == 'Callable' for arg in self.function_info.args):
+            if not _MOCK_RE.search(self.test_code):
                 self.warnings.append("Callable argument detected but no mocks found")
                 
         return True  # Warning only
 
     def validate_dependencies(self) -> bool:
         """Check if required dependencies are imported"""
+        if not self._scan_tree():
+            return False
         try:
-            tree = ast.parse(self.test_code)
-            imports = []
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    imports.extend([alias.name for alias in node.names])
-                elif isinstance(node, ast.ImportFrom):
-                    imports.append(node.module)
+            imports = self._imports + self._from_imports
                     
-            # Check for existence of imported modules
+            # Check for existence of imported modules without executing them
             for imp in imports:
-                try:
-                    importlib.import_module(imp)
-                except ImportError:
+                if imp is None:
+                    # Relative "from . import x" has no module to resolve
+                    continue
+                # find_spec("pkg.sub") imports pkg, so only the top-level name is resolved
+                if not self._module_exists(imp.partition(".")[0]):
                     self.errors.append(f"Missing dependency: {imp}")
                     return False
                     
@@ -150,7 +212,19 @@ class TestValidator:
             self.errors.append(f"Dependency check failed: {str(e)}")
             return False
 
-def validate_test_case(test_code: str, function_info: Dict = None) -> Tuple[bool, List[str]]:
+    @classmethod
+    def _module_exists(cls, name: str) -> bool:
+        """Resolve a top-level module spec (cached) without importing the module itself"""
+        found = cls._spec_cache.get(name)
+        if found is None:
+            try:
+                found = importlib.util.find_spec(name) is not None
+            except (ValueError, ModuleNotFoundError):
+                found = False
+            cls._spec_cache[name] = found
+        return found
+
+def validate_test_case(test_code: str, function_info: Optional[FunctionInfo] = None) -> Tuple[bool, List[str]]:
     """Public validation interface"""
     validator = TestValidator(test_code, function_info)
     return validator.validate_all()
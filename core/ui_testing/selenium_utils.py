@@ -3,16 +3,26 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
 from pathlib import Path
+import tempfile
+import threading
 import time
+import uuid
+import pytest
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SeleniumTestGenerator:
+    # One Chrome instance is shared by every generator in the process;
+    # it is quit once the last generator holding it closes
+    _driver_singleton = None
+    _driver_users = 0
+    _driver_lock = threading.Lock()
+
     def __init__(self, headless: bool = True):
         """
         Initialize the Selenium test generator.
@@ -24,20 +34,26 @@ class SeleniumTestGenerator:
         self.driver = None
 
     def initialize_driver(self):
-        """Initialize the Selenium WebDriver with optional headless mode."""
-        options = webdriver.ChromeOptions()
-        if self.headless:
-            options.add_argument("--headless=new")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-
-        try:
-            self.driver = webdriver.Chrome(options=options)
-            logger.info("Selenium WebDriver initialized successfully.")
-        except Exception as e:
-            logger.error(f"Failed to initialize WebDriver: {e}")
-            raise
+        """Initialize the shared Selenium WebDriver with optional headless mode."""
+        with SeleniumTestGenerator._driver_lock:
+            if SeleniumTestGenerator._driver_singleton is None:
+                options = webdriver.ChromeOptions()
+                if self.headless:
+                    options.add_argument("--headless=new")
+                options.add_argument("--disable-gpu")
+                options.add_argument("--no-sandbox")
+                options.add_argument("--disable-dev-shm-usage")
+
+                try:
+                    SeleniumTestGenerator._driver_singleton = webdriver.Chrome(options=options)
+                    logger.info("Selenium WebDriver initialized successfully.")
+                except Exception as e:
+                    logger.error(f"Failed to initialize WebDriver: {e}")
+                    raise
+            if self.driver is None:
+                SeleniumTestGenerator._driver_users += 1
+            self.driver = SeleniumTestGenerator._driver_singleton
+        return self.driver
 
     def generate_ui_test(self, ui_element_info: Dict) -> Tuple[bool, Optional[str]]:
         """
@@ -49,9 +65,6 @@ class SeleniumTestGenerator:
         Returns:
             Tuple[bool, Optional[str]]: (success, test_code)
         """
-        if not self.driver:
-            self.initialize_driver()
-
         element_id = ui_element_info.get("id")
         element_xpath = ui_element_info.get("xpath")
         element_name = ui_element_info.get("name", "element")
@@ -85,7 +98,7 @@ def test_{element_name}_interaction(driver):
         # Add assertions here
         assert element.is_displayed(), "Element is not displayed"
     except Exception as e:
-        pytest.fail(f"Test failed: {e}")
+        pytest.fail(f"Test failed: {{e}}")
 """
             logger.info(f"Generated UI test for element: {element_name}")
             return True, test_code
@@ -96,7 +109,7 @@ def test_{element_name}_interaction(driver):
 
     def execute_ui_test(self, test_code: str) -> bool:
         """
-        Execute a generated Selenium test.
+        Execute a single generated Selenium test.
 
         Args:
             test_code (str): The generated test code to execute.
@@ -104,29 +117,47 @@ def test_{element_name}_interaction(driver):
         Returns:
             bool: True if the test passed, False otherwise.
         """
+        return self.execute_ui_tests([test_code])
+
+    def execute_ui_tests(self, test_codes: List[str]) -> bool:
+        """
+        Execute a batch of generated Selenium tests in a single in-process pytest run.
+
+        Args:
+            test_codes (List[str]): The generated test code for each test module.
+
+        Returns:
+            bool: True if every test passed, False otherwise.
+        """
         try:
-            # Save the test code to a temporary file
-            test_file = Path("temp_ui_test.py")
-            with open(test_file, "w") as f:
-                f.write(test_code)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                # Unique module names keep repeated runs in this process from colliding
+                batch_id = uuid.uuid4().hex[:8]
+                for index, test_code in enumerate(test_codes):
+                    test_file = Path(tmpdir) / f"test_ui_{batch_id}_{index}.py"
+                    test_file.write_text(test_code)
 
-            # Execute the test using pytest
-            import subprocess
-            result = subprocess.run(["pytest", str(test_file)], capture_output=True, text=True)
+                exit_code = pytest.main([tmpdir, "-q", "-p", "no:cacheprovider"])
 
-            if result.returncode == 0:
-                logger.info("UI test executed successfully.")
+            if exit_code == pytest.ExitCode.OK:
+                logger.info("UI tests executed successfully.")
                 return True
             else:
-                logger.error(f"UI test failed:\n{result.stderr}")
+                logger.error(f"UI tests failed with pytest exit code {int(exit_code)}")
                 return False
 
         except Exception as e:
-            logger.error(f"Error executing UI test: {e}")
+            logger.error(f"Error executing UI tests: {e}")
             return False
 
     def close(self):
-        """Close the WebDriver."""
-        if self.driver:
-            self.driver.quit()
-            logger.info("WebDriver closed.")
\ No newline at end of file
+        """Release this generator's WebDriver, quitting the shared one when no other generator uses it."""
+        with SeleniumTestGenerator._driver_lock:
+            if self.driver is None:
+                return
+            self.driver = None
+            SeleniumTestGenerator._driver_users -= 1
+            if SeleniumTestGenerator._driver_users == 0 and SeleniumTestGenerator._driver_singleton:
+                SeleniumTestGenerator._driver_singleton.quit()
+                SeleniumTestGenerator._driver_singleton = None
+                logger.info("WebDriver closed.")
\ No newline at end of file
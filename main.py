@@ -1,134 +1,335 @@
 import argparse
+import asyncio
 import os
 import logging
 import re
-import hashlib
+import pickle
+import sqlite3
+import sys
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Awaitable, Dict, List, NamedTuple, Tuple, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
-from config.settings import OPENAI_API_KEY
-from core.code_parser.ast_parser import parse_python_file
+from openai import AuthenticationError
+from core.code_parser.ast_parser import ParsedItem, create_parse_executor, parse_python_file, parse_python_source
 from core.test_generator.ai_prompts import (
     generate_unit_test_prompt,
     generate_integration_test_prompt,
     generate_ui_test_prompt
 )
-from core.test_generator.test_gen import TestGenerator
+from core.test_generator.cache import ResponseCache, content_hash
+from core.test_generator.test_gen import TestGenerator, close_async_client
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 logger = logging.getLogger(__name__)
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-def process_file(input_file: str, test_type: str) -> Dict[str, List[str]]:
+AST_CACHE_PATH = Path.home() / ".ai-test-gen" / "ast_cache.sqlite"
+# Bump when the parser's output shape changes so stale pickles are never loaded
+AST_CACHE_VERSION = "2"
+
+def _open_ast_cache(cache_path: Path = AST_CACHE_PATH) -> sqlite3.Connection:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(cache_path)
+    # WAL lets concurrent CLI invocations read while another one writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS ast(key TEXT PRIMARY KEY, blob BLOB)")
+    return conn
+
+def parse_python_file_cached(input_file: str, use_cache: bool = True) -> Dict[str, List]:
+    """Parse a file, reusing the stored result when its content hash is already cached"""
+    if not use_cache:
+        return parse_python_file(input_file)
+    # Read once: the same bytes feed both the cache key and the parser
+    full_path = os.path.abspath(input_file)
+    content_bytes = Path(full_path).read_bytes()
+    key = f"{AST_CACHE_VERSION}:{content_hash(content_bytes)}"
+    try:
+        conn = _open_ast_cache(AST_CACHE_PATH)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"AST cache unavailable, parsing without it: {e}")
+        return parse_python_source(content_bytes, full_path)
+    try:
+        row = conn.execute("SELECT blob FROM ast WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            logger.info(f"Using cached AST for {input_file}")
+            return pickle.loads(row[0])
+        parsed_data = parse_python_source(content_bytes, full_path)
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO ast(key, blob) VALUES (?, ?)", (key, pickle.dumps(parsed_data)))
+        except sqlite3.OperationalError as e:
+            # Parallel parse workers share the cache file; losing one write only costs a re-parse later
+            logger.warning(f"Could not store AST for {input_file}: {e}")
+        return parsed_data
+    finally:
+        conn.close()
+
+INTEGRATION_DEPENDENCIES = ["database", "external_service"]
+
+def _unit_prompt(item: ParsedItem, name: str) -> str:
+    return generate_unit_test_prompt(item)
+
+def _integration_prompt(item: ParsedItem, name: str) -> str:
+    return generate_integration_test_prompt(item, INTEGRATION_DEPENDENCIES)
+
+def _ui_prompt(item: ParsedItem, name: str) -> str:
+    # Keys follow generate_ui_test_prompt's id/xpath/name lookup; parsed code carries no locators
+    ui_info = {
+        "id": name,
+        "xpath": "",
+        "name": item.name,
+        "dependencies": "None"
+    }
+    return generate_ui_test_prompt(ui_info)
+
+PROMPT_BUILDERS = {"unit": _unit_prompt, "integration": _integration_prompt, "ui": _ui_prompt}
+
+def _duplicate_outcome(outcome):
+    """Outcome reported for items that reused another item's request: its test is already written"""
+    if isinstance(outcome, tuple) and outcome[0] and outcome[1] is not None:
+        return True, None
+    return outcome
+
+class WorkItem(NamedTuple):
+    name: str  # Filename prefix, e.g. "Greeter_greet"
+    payload: ParsedItem
+    kind: str  # "function", "method" or "class"
+    display_name: str  # Log label, e.g. "Greeter.greet"
+
+def build_work_items(parsed_data: Dict[str, List]) -> List[WorkItem]:
+    """Flatten functions, methods and method-less classes into one homogeneous list"""
+    functions = parsed_data.get("functions", [])
+    classes = parsed_data.get("classes", [])
+    return (
+        [WorkItem(f.name, f, "function", f.name) for f in functions]
+        + [
+            WorkItem(f"{c.name}_{m.name}", m, "method", f"{c.name}.{m.name}")
+            for c in classes for m in c.methods
+        ]
+        + [WorkItem(c.name, c, "class", c.name) for c in classes if not c.methods]
+    )
+
+async def run_task_group(coros: List[Awaitable]) -> None:
+    """Run coroutines as one unit: the first failure cancels the rest and is re-raised"""
+    if sys.version_info < (3, 11):
+        await _gather_cancelling(coros)
+        return
+    try:
+        async with asyncio.TaskGroup() as group:
+            for coro in coros:
+                group.create_task(coro)
+    except BaseExceptionGroup as group_error:  # noqa: F821 - builtin since 3.11
+        # Surface the original error (e.g. AuthenticationError) rather than the group wrapper
+        raise group_error.exceptions[0]
+
+async def _gather_cancelling(coros: List[Awaitable]) -> None:
+    """Pre-3.11 fallback for run_task_group with the same cancellation semantics"""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+def collect_input_files(inputs: List[str]) -> List[str]:
+    """Expand directories into the Python files beneath them"""
+    paths: List[str] = []
+    for entry in inputs:
+        entry_path = Path(entry)
+        if entry_path.is_dir():
+            paths.extend(str(path) for path in sorted(entry_path.rglob("*.py")))
+        elif entry_path.exists():
+            paths.append(entry)
+        else:
+            raise FileNotFoundError(f"Input file '{entry}' does not exist.")
+    return paths
+
+async def process_files(input_files: List[str], test_type: str, max_concurrent: int = 5, pack_size: int = 1, use_cache: bool = True, requests_per_minute: Optional[int] = None, use_batch_api: bool = False) -> Dict[str, List[str]]:
     results: Dict[str, List[str]] = {"generated_tests": [], "errors": []}
     try:
-        input_path = Path(input_file)
-        if not input_path.exists():
-            raise FileNotFoundError(f"Input file '{input_file}' does not exist.")
-        parsed_data = parse_python_file(input_file)
-        functions = parsed_data.get("functions", [])
-        classes = parsed_data.get("classes", [])
-        test_gen = TestGenerator(output_dir=f"tests/{test_type}")
-        for func in functions:
+        if pack_size < 1:
+            raise ValueError(f"pack_size must be at least 1, got {pack_size}")
+        paths = collect_input_files(input_files)
+        # Resolve the prompt builder once instead of branching on test_type for every item
+        if test_type not in PROMPT_BUILDERS:
+            raise ValueError(f"Unsupported test type: {test_type}")
+        build_prompt = PROMPT_BUILDERS[test_type]
+        cache = None
+        if use_cache:
             try:
-                logger.info(f"Processing function: {func['name']}")
-                if test_type == "unit":
-                    success, test_code = test_gen.generate_test_case(func)
-                elif test_type == "integration":
-                    dependencies = ["database", "external_service"]
-                    prompt = generate_integration_test_prompt(func, dependencies)
-                    success, test_code = test_gen.generate_test_case({**func, "prompt_override": prompt}, model="gpt-3.5-turbo")
-                elif test_type == "ui":
-                    ui_info = {
-                        "element_id": func.get("element_id", func.get("name", "")),
-                        "element_xpath": func.get("element_xpath", ""),
-                        "element_name": func.get("element_name", func.get("name", "")),
-                        "dependencies": func.get("dependencies", "None")
-                    }
-                    prompt = generate_ui_test_prompt(ui_info)
-                    success, test_code = test_gen.generate_test_case({**func, "prompt_override": prompt}, model="gpt-3.5-turbo")
-                else:
-                    raise ValueError(f"Unsupported test type: {test_type}")
-                if success:
-                    test_filename = test_gen._generate_test_filename(func["name"], test_code)
-                    test_path = Path(test_gen.output_dir) / test_filename
+                cache = ResponseCache()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Response cache unavailable, continuing without it: {e}")
+        test_gen = TestGenerator(
+            output_dir=f"tests/{test_type}",
+            cache=cache,
+            requests_per_minute=requests_per_minute
+        )
+        # TestGenerator has already created the directory
+        output_dir_path = Path(test_gen.output_dir)
+
+        async def build_task(work_item: WorkItem, prompt: str) -> Tuple[bool, Optional[str]]:
+            logger.info(f"Processing {work_item.kind}: {work_item.display_name}")
+            return await test_gen.async_generate_test_case(work_item.payload, prompt_override=prompt, model="gpt-3.5-turbo")
+
+        async def build_packed_task(chunk: List[WorkItem], prompts: List[str]) -> List[Tuple[bool, Optional[str]]]:
+            logger.info(f"Processing {len(chunk)} items in one request: {', '.join(w.display_name for w in chunk)}")
+            payloads = [w.payload for w in chunk]
+            return await test_gen.async_generate_test_cases_packed(payloads, prompts, model="gpt-3.5-turbo")
+
+        def record(work_items: List[WorkItem], outcomes: List) -> None:
+            for work_item, outcome in zip(work_items, outcomes):
+                display_name = work_item.display_name
+                if isinstance(outcome, Exception):
+                    error_msg = f"Error processing {work_item.kind} {display_name}: {outcome}"
+                    results["errors"].append(error_msg)
+                    logger.error(error_msg, exc_info=outcome)
+                    continue
+                success, test_code = outcome
+                if success and test_code is None:
+                    logger.info(f"Skipped duplicate {test_type} test for {display_name}")
+                elif success:
+                    # Files are named after the function itself; the digest is already cached from saving
+                    test_path = output_dir_path / test_gen._generate_test_filename(work_item.payload.name, test_code)
                     results["generated_tests"].append(str(test_path))
-                    logger.info(f"Successfully generated {test_type} test for {func['name']}")
+                    logger.info(f"Successfully generated {test_type} test for {display_name}")
                 else:
-                    error_msg = f"Failed to generate test for {func['name']}"
+                    error_msg = f"Failed to generate test for {display_name}"
                     results["errors"].append(error_msg)
                     logger.error(error_msg)
-            except Exception as func_error:
-                error_msg = f"Error processing {func['name']}: {func_error}"
-                results["errors"].append(error_msg)
-                logger.exception(error_msg)
-        for cls in classes:
+
+        def record_parse_error(path: str, error: Exception) -> None:
+            error_msg = f"Error parsing {path}: {error}"
+            results["errors"].append(error_msg)
+            logger.error(error_msg)
+
+        def record_file_error(path: str, error: Exception) -> None:
+            error_msg = f"Error processing {path}: {error}"
+            results["errors"].append(error_msg)
+            logger.error(error_msg, exc_info=error)
+
+        # Identical prompts (e.g. __repr__ across classes) are sent once; items wait in their group
+        # until the response arrives, and later arrivals reuse the settled outcome
+        prompt_groups: Dict[str, List[WorkItem]] = {}
+        group_prompts: Dict[str, str] = {}
+        settled: Dict[str, object] = {}
+
+        def add_work_item(work_item: WorkItem) -> Optional[str]:
+            """Group an item by prompt hash; returns the key only when the prompt still has to be sent"""
+            try:
+                prompt = build_prompt(work_item.payload, work_item.name)
+            except Exception as e:
+                # e.g. a method-less class has no args or return type to render
+                record([work_item], [e])
+                return None
+            key = content_hash(prompt.encode("utf-8"))
+            if key in settled:
+                record([work_item], [_duplicate_outcome(settled[key])])
+                return None
+            if key in prompt_groups:
+                logger.info(f"{work_item.display_name} shares its prompt with {prompt_groups[key][0].display_name}; reusing that request")
+                prompt_groups[key].append(work_item)
+                return None
+            prompt_groups[key] = [work_item]
+            group_prompts[key] = prompt
+            return key
+
+        def settle(key: str, outcome) -> None:
+            """Record one request's outcome for every item that shares its prompt"""
+            settled[key] = outcome
+            group = prompt_groups.pop(key)
+            del group_prompts[key]
+            record(group, [outcome] + [_duplicate_outcome(outcome)] * (len(group) - 1))
+
+        async def send(keys: List[str]) -> None:
+            representatives = [prompt_groups[key][0] for key in keys]
+            prompts = [group_prompts[key] for key in keys]
             try:
-                logger.info(f"Processing class: {cls['name']}")
-                methods = cls.get("methods", [])
-                if methods:
-                    for method in methods:
-                        logger.info(f"Processing method: {cls['name']}.{method['name']}")
-                        if test_type == "unit":
-                            success, test_code = test_gen.generate_test_case(method)
-                        elif test_type == "integration":
-                            dependencies = ["database", "external_service"]
-                            prompt = generate_integration_test_prompt(method, dependencies)
-                            success, test_code = test_gen.generate_test_case({**method, "prompt_override": prompt}, model="gpt-3.5-turbo")
-                        elif test_type == "ui":
-                            ui_info = {
-                                "element_id": method.get("element_id", f"{cls['name']}_{method['name']}"),
-                                "element_xpath": method.get("element_xpath", ""),
-                                "element_name": method.get("element_name", method.get("name", f"{cls['name']}_{method['name']}")),
-                                "dependencies": method.get("dependencies", "None")
-                            }
-                            prompt = generate_ui_test_prompt(ui_info)
-                            success, test_code = test_gen.generate_test_case({**method, "prompt_override": prompt}, model="gpt-3.5-turbo")
-                        else:
-                            raise ValueError(f"Unsupported test type: {test_type}")
-                        if success:
-                            test_filename = test_gen._generate_test_filename(f"{cls['name']}_{method['name']}", test_code)
-                            test_path = Path(test_gen.output_dir) / test_filename
-                            results["generated_tests"].append(str(test_path))
-                            logger.info(f"Successfully generated {test_type} test for {cls['name']}.{method['name']}")
-                        else:
-                            error_msg = f"Failed to generate test for {cls['name']}.{method['name']}"
-                            results["errors"].append(error_msg)
-                            logger.error(error_msg)
+                if len(keys) == 1:
+                    outcomes = [await build_task(representatives[0], prompts[0])]
                 else:
-                    logger.info(f"Processing class: {cls['name']} (no methods)")
-                    if test_type == "unit":
-                        success, test_code = test_gen.generate_test_case(cls)
-                    elif test_type == "integration":
-                        dependencies = ["database", "external_service"]
-                        prompt = generate_integration_test_prompt(cls, dependencies)
-                        success, test_code = test_gen.generate_test_case({**cls, "prompt_override": prompt}, model="gpt-3.5-turbo")
-                    elif test_type == "ui":
-                        ui_info = {
-                            "element_id": cls.get("element_id", cls.get("name", "")),
-                            "element_xpath": cls.get("element_xpath", ""),
-                            "element_name": cls.get("element_name", cls.get("name", "")),
-                            "dependencies": cls.get("dependencies", "None")
-                        }
-                        prompt = generate_ui_test_prompt(ui_info)
-                        success, test_code = test_gen.generate_test_case({**cls, "prompt_override": prompt}, model="gpt-3.5-turbo")
-                    else:
-                        raise ValueError(f"Unsupported test type: {test_type}")
-                    if success:
-                        test_filename = test_gen._generate_test_filename(cls["name"], test_code)
-                        test_path = Path(test_gen.output_dir) / test_filename
-                        results["generated_tests"].append(str(test_path))
-                        logger.info(f"Successfully generated {test_type} test for {cls['name']}")
-                    else:
-                        error_msg = f"Failed to generate test for {cls['name']}"
-                        results["errors"].append(error_msg)
-                        logger.error(error_msg)
-            except Exception as cls_error:
-                error_msg = f"Error processing class {cls['name']}: {cls_error}"
-                results["errors"].append(error_msg)
-                logger.exception(error_msg)
+                    outcomes = await build_packed_task(representatives, prompts)
+            except AuthenticationError:
+                # Every other request would fail the same way; abort the run instead
+                raise
+            except Exception as e:
+                outcomes = [e] * len(keys)
+            for key, outcome in zip(keys, outcomes):
+                settle(key, outcome)
+
+        loop = asyncio.get_running_loop()
+        # Parsing is CPU-bound, so larger inputs are parsed in worker processes outside the GIL,
+        # using the same pool policy as parse_python_files
+        pool = create_parse_executor(len(paths))
+
+        async def parse(path: str) -> Dict[str, List]:
+            if pool is None:
+                return parse_python_file_cached(path, use_cache)
+            return await loop.run_in_executor(pool, parse_python_file_cached, path, use_cache)
+
+        try:
+            if use_batch_api:
+                # Every prompt goes into one Batch API job, so all files are parsed first
+                keys = []
+                for path, parsed_data in zip(paths, await asyncio.gather(*(parse(p) for p in paths), return_exceptions=True)):
+                    if isinstance(parsed_data, Exception):
+                        record_parse_error(path, parsed_data)
+                        continue
+                    for work_item in build_work_items(parsed_data):
+                        key = add_work_item(work_item)
+                        if key is not None:
+                            keys.append(key)
+                payloads = [prompt_groups[key][0].payload for key in keys]
+                prompts = [group_prompts[key] for key in keys]
+                logger.info(f"Submitting {len(keys)} unique prompts to the OpenAI Batch API")
+                # Results come back keyed by custom_id
+                outcomes = await asyncio.to_thread(test_gen.generate_test_cases_via_batch_api, payloads, prompts, "gpt-3.5-turbo")
+                for key, outcome in zip(keys, outcomes):
+                    settle(key, outcome)
+            else:
+                # Producers enqueue each file's work as soon as it is parsed; a fixed pool of consumers
+                # sends requests and records every result the moment it completes
+                queue = asyncio.Queue()
+
+                async def produce(path: str) -> None:
+                    try:
+                        parsed_data = await parse(path)
+                    except Exception as e:
+                        record_parse_error(path, e)
+                        return
+                    try:
+                        keys = [key for key in map(add_work_item, build_work_items(parsed_data)) if key is not None]
+                    except Exception as e:
+                        # Only AuthenticationError from a request may cancel the run; file problems stay local
+                        record_file_error(path, e)
+                        return
+                    # With packing, several prompts share one request and a failed request fails the whole chunk
+                    for i in range(0, len(keys), pack_size):
+                        queue.put_nowait(keys[i:i + pack_size])
+
+                async def consume() -> None:
+                    while True:
+                        keys = await queue.get()
+                        if keys is None:
+                            return
+                        await send(keys)
+
+                # The consumer count bounds in-flight OpenAI requests to stay within rate limits
+                consumer_count = max(1, max_concurrent)
+
+                async def produce_all() -> None:
+                    await asyncio.gather(*(produce(p) for p in paths))
+                    for _ in range(consumer_count):
+                        queue.put_nowait(None)
+
+                # Structured concurrency: a fatal error in any stage cancels all in-flight requests
+                await run_task_group([produce_all()] + [consume() for _ in range(consumer_count)])
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            await close_async_client()
         return results
     except Exception as e:
         error_msg = f"Fatal error: {e}"
@@ -136,13 +337,27 @@ def process_file(input_file: str, test_type: str) -> Dict[str, List[str]]:
         logger.exception("Fatal error during file processing")
         return results
 
+async def process_file(input_file: str, test_type: str, max_concurrent: int = 5, pack_size: int = 1, use_cache: bool = True, requests_per_minute: Optional[int] = None, use_batch_api: bool = False) -> Dict[str, List[str]]:
+    return await process_files([input_file], test_type, max_concurrent, pack_size, use_cache, requests_per_minute, use_batch_api)
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="AI Test Case Generator")
-    parser.add_argument("--input", required=True, help="Input Python file to analyze")
+    parser.add_argument("--input", required=True, nargs="+", help="Input Python files or directories to analyze")
     parser.add_argument("--test-type", required=True, choices=["unit", "integration", "ui"], help="Type of tests to generate")
+    parser.add_argument("--max-concurrent", type=int, default=5, help="Maximum number of concurrent OpenAI requests")
+    parser.add_argument("--requests-per-minute", type=int, default=None, help="Cap on OpenAI requests started per minute (default: no cap)")
+    parser.add_argument("--batch", action="store_true", help="Submit all prompts through the OpenAI Batch API (completes within 24h at lower cost)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the parsed-file and LLM response caches")
+    parser.add_argument("--pack-size", type=_positive_int, default=1, help="Number of items to request in a single OpenAI call (1 disables packing)")
     args = parser.parse_args()
-    logger.info(f"Generating {args.test_type} tests for: {args.input}")
-    results = process_file(args.input, args.test_type)
+    logger.info(f"Generating {args.test_type} tests for: {', '.join(args.input)}")
+    results = asyncio.run(process_files(args.input, args.test_type, args.max_concurrent, args.pack_size, not args.no_cache, args.requests_per_minute, args.batch))
     logger.info(f"Process completed with {len(results['generated_tests'])} tests generated")
     logger.info(f"Errors encountered: {len(results['errors'])}")
     if results["errors"]:
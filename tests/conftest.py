@@ -1,3 +1,38 @@
 import sys
 import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
\ No newline at end of file
+import json
+from types import SimpleNamespace
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+@pytest.fixture
+def make_api_error():
+    """Fixture building OpenAI status errors without a real HTTP response"""
+    def build(error_class, status_code):
+        response = SimpleNamespace(request=None, status_code=status_code, headers={})
+        return error_class(f"HTTP {status_code}", response=response, body=None)
+    return build
+
+@pytest.fixture
+def fake_batch_client(monkeypatch):
+    """Fixture faking the OpenAI files/batches API; `respond` maps submitted requests to output lines"""
+    from core.test_generator import test_gen
+
+    state = SimpleNamespace(submitted=[], respond=None)
+
+    def create_file(file, purpose):
+        state.submitted.extend(json.loads(line) for line in file[1].decode("utf-8").splitlines())
+        return SimpleNamespace(id="file-in")
+
+    def create_batch(**kwargs):
+        return SimpleNamespace(id="batch-1", status="completed", output_file_id="file-out")
+
+    def content(file_id):
+        return SimpleNamespace(text="\n".join(state.respond(state.submitted)))
+
+    client = SimpleNamespace(
+        files=SimpleNamespace(create=create_file, content=content),
+        batches=SimpleNamespace(create=create_batch, retrieve=None)
+    )
+    monkeypatch.setattr(test_gen, "_get_client", lambda: client)
+    return state
@@ -3,7 +3,7 @@
 import pytest
 import os
 import ast
-from core.code_parser.ast_parser import parse_python_file, extract_function_info, extract_class_info
+from core.code_parser.ast_parser import create_parse_executor, parse_python_file, parse_python_files, parse_python_source, extract_function_info, extract_class_info, ClassInfo, FunctionInfo
 
 @pytest.fixture
 def sample_file(tmp_path):
@@ -34,12 +34,12 @@ def add(a: int, b: int) -> int:
     
     assert len(result["functions"]) == 1
     func = result["functions"][0]
-    assert func["name"] == "add"
-    assert [a["name"] for a in func["args"]] == ["a", "b"]
-    assert func["return_type"] == "int"
-    assert func["docstring"] == "Add two numbers"
-    assert func["start_line"] == 2
-    assert func["end_line"] == 4
+    assert func.name == "add"
+    assert [a.name for a in func.args] == ["a", "b"]
+    assert func.return_type == "int"
+    assert func.docstring == "Add two numbers"
+    assert func.start_line == 2
+    assert func.end_line == 4
 
 def test_class_with_methods(sample_file):
     """Test parsing of a class with methods"""
@@ -58,17 +58,18 @@ class Calculator:
     
     assert len(result["classes"]) == 1
     cls = result["classes"][0]
-    assert cls["name"] == "Calculator"
-    assert cls["docstring"] == "Basic calculator class"
-    assert len(cls["methods"]) == 2
+    assert isinstance(cls, ClassInfo)
+    assert cls.name == "Calculator"
+    assert cls.docstring == "Basic calculator class"
+    assert len(cls.methods) == 2
     
-    init_method = cls["methods"][0]
-    assert init_method["name"] == "__init__"
-    assert init_method["args"][1]["name"] == "precision"
-    assert init_method["args"][1]["type"] == "int"
+    init_method = cls.methods[0]
+    assert init_method.name == "__init__"
+    assert init_method.args[1].name == "precision"
+    assert init_method.args[1].type == "int"
     
-    add_method = cls["methods"][1]
-    assert add_method["return_type"] == "float"
+    add_method = cls.methods[1]
+    assert add_method.return_type == "float"
 
 def test_function_with_complex_args(sample_file):
     """Test parsing of complex argument types"""
@@ -86,28 +87,28 @@ def process_data(
     result = parse_python_file(file_path)
     
     func = result["functions"][0]
-    args = func["args"]
+    args = func.args
     
     # Check positional arguments
-    assert args[0]["name"] == "data"
-    assert args[0]["type"] == "list[dict[str, int]]"
+    assert args[0].name == "data"
+    assert args[0].type == "list[dict[str, int]]"
     
-    assert args[1]["name"] == "callback"
-    assert args[1]["type"] == "Callable[[int], None]"
+    assert args[1].name == "callback"
+    assert args[1].type == "Callable[[int], None]"
     
     # Check variable positional arguments (*args)
-    assert args[2]["name"] == "args"
-    assert args[2]["type"] == "str"
-    assert args[2].get("is_vararg") is True
+    assert args[2].name == "args"
+    assert args[2].type == "str"
+    assert args[2].is_vararg is True
     
     # Check keyword argument with default value
-    assert args[3]["name"] == "timeout"
-    assert args[3]["type"] == "float"
+    assert args[3].name == "timeout"
+    assert args[3].type == "float"
     
     # Check variable keyword arguments (**kwargs)
-    assert args[4]["name"] == "kwargs"
-    assert args[4]["type"] == "Any"
-    assert args[4].get("is_kwarg") is True
+    assert args[4].name == "kwargs"
+    assert args[4].type == "Any"
+    assert args[4].is_kwarg is True
 
 def test_error_handling(sample_file):
     """Test parser error handling"""
@@ -134,8 +135,8 @@ def calculate(rate: int, amount: float) -> float:
     result = parse_python_file(file_path)
     
     func = result["functions"][0]
-    assert func["name"] == "calculate"
-    assert len(func["args"]) == 2
+    assert func.name == "calculate"
+    assert len(func.args) == 2
 
 # tests/test_ast_parser.py (partial update)
 
@@ -153,8 +154,8 @@ async def fetch_data(url: str) -> dict:
     
     assert len(result["functions"]) == 1
     func = result["functions"][0]
-    assert func["name"] == "fetch_data"
-    assert func["is_async"] is True
+    assert func.name == "fetch_data"
+    assert func.is_async is True
 
 def test_class_inheritance(sample_file):
     """Test parsing of class inheritance"""
@@ -166,7 +167,7 @@ class AdvancedCalculator(Calculator, Loggable):
     result = parse_python_file(file_path)
     
     cls = result["classes"][0]
-    assert cls["bases"] == ["Calculator", "Loggable"]
+    assert cls.bases == ("Calculator", "Loggable")
 
 def test_type_alias_handling(sample_file):
     """Test parsing of type aliases"""
@@ -180,4 +181,80 @@ def normalize(v: Vector) -> Vector:
     result = parse_python_file(file_path)
     
     func = result["functions"][0]
-    assert func["args"][0]["type"] == "Vector"
\ No newline at end of file
+    assert func.args[0].type == "Vector"
+
+@pytest.mark.parametrize("annotation", ["None", "'Node'", "\"it's\"", "Optional[int]", "int | None", "Literal[1, 'a']"])
+def test_annotation_text_matches_unparse(sample_file, annotation):
+    """Test that annotation fast paths produce the same text as ast.unparse"""
+    file_path = sample_file(f"def f(x: {annotation}) -> {annotation}:\n    pass\n")
+    func = parse_python_file(file_path)["functions"][0]
+
+    expected = ast.unparse(ast.parse(annotation, mode="eval").body)
+    assert func.args[0].type == func.return_type == expected
+
+def test_nested_definitions_not_top_level(sample_file):
+    """Test that only module-level functions and classes are reported"""
+    content = """
+def outer(x: int) -> int:
+    def inner(y: int) -> int:
+        return y
+    return inner(x)
+
+class Service:
+    async def run(self) -> None:
+        pass
+"""
+    file_path = sample_file(content)
+    result = parse_python_file(file_path)
+
+    assert [f.name for f in result["functions"]] == ["outer"]
+    assert [m.name for m in result["classes"][0].methods] == ["run"]
+    assert result["classes"][0].methods[0].is_async is True
+
+
+def test_function_info_record(sample_file):
+    """Test that function records are immutable and convert to plain dicts"""
+    content = """
+def scale(value: float, *factors: int) -> float:
+    return value
+"""
+    file_path = sample_file(content)
+    func = parse_python_file(file_path)["functions"][0]
+
+    assert isinstance(func, FunctionInfo)
+    assert func.name == "scale"
+    assert func.args[1].is_vararg is True
+    with pytest.raises(AttributeError):
+        func.name = "other"
+    assert func.as_dict()["args"][0] == {"name": "value", "type": "float", "is_vararg": False, "is_kwarg": False}
+
+
+def test_parse_multiple_files(tmp_path):
+    """Test parallel parsing keeps results keyed by path"""
+    paths = []
+    for i in range(5):
+        file_path = tmp_path / f"module_{i}.py"
+        file_path.write_text(f"def func_{i}(x: int) -> int:\n    return x\n")
+        paths.append(str(file_path))
+
+    result = parse_python_files(paths, workers=2)
+
+    assert list(result) == paths
+    for i, path in enumerate(paths):
+        assert [f.name for f in result[path]["functions"]] == [f"func_{i}"]
+
+def test_parse_executor_only_for_larger_inputs():
+    """Test that a worker pool is only created once there are enough files to amortize it"""
+    assert create_parse_executor(3) is None
+    executor = create_parse_executor(8, workers=2)
+    assert executor is not None
+    executor.shutdown()
+
+def test_parse_python_source_bytes():
+    """Test parsing in-memory source bytes without touching the filesystem"""
+    result = parse_python_source(b"def ping() -> str:\n    return 'pong'\n", "memory.py")
+
+    assert [f.name for f in result["functions"]] == ["ping"]
+    with pytest.raises(SyntaxError) as exc_info:
+        parse_python_source(b"def broken(", "memory.py")
+    assert "Syntax error in memory.py" in str(exc_info.value)
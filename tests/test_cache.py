@@ -0,0 +1,26 @@
+import pytest
+from core.test_generator.cache import ResponseCache
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture providing a response cache in a temporary directory"""
+    response_cache = ResponseCache(tmp_path / "llm_cache.sqlite")
+    yield response_cache
+    response_cache.close()
+
+def test_cache_roundtrip(cache):
+    """Test that stored responses are returned for the same model and prompt"""
+    assert cache.get("gpt-3.5-turbo", "prompt") is None
+    cache.set("gpt-3.5-turbo", "prompt", "def test_x():\n    assert True")
+
+    assert cache.get("gpt-3.5-turbo", "prompt") == "def test_x():\n    assert True"
+    assert cache.get("gpt-4", "prompt") is None
+    assert cache.get("gpt-3.5-turbo", "other prompt") is None
+
+def test_cache_expiry(tmp_path):
+    """Test that entries older than the TTL are ignored"""
+    expired = ResponseCache(tmp_path / "llm_cache.sqlite", ttl_seconds=-1)
+    expired.set("gpt-3.5-turbo", "prompt", "response")
+
+    assert expired.get("gpt-3.5-turbo", "prompt") is None
+    expired.close()
@@ -0,0 +1,32 @@
+# tests/test_git_integration.py
+
+import subprocess
+from pathlib import Path
+import pytest
+from core.code_parser.git_integration import _changed_test_files
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Fixture creating a git repository with one committed generated test"""
+    monkeypatch.chdir(tmp_path)
+    def git(*args):
+        subprocess.run(["git", *args], check=True, capture_output=True)
+    git("init", "-q")
+    git("config", "user.email", "tests@example.com")
+    git("config", "user.name", "tests")
+    (tmp_path / "tests" / "unit").mkdir(parents=True)
+    (tmp_path / "tests" / "unit" / "test_old.py").write_text("def test_old():\n    assert True\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "init")
+    return git
+
+def test_changed_test_files_lists_untracked_and_modified(repo):
+    """Test that new tests survive unrelated commits and modified tests are picked up"""
+    Path("tests/unit/test_new.py").write_text("def test_new():\n    assert True\n")
+    Path("other.txt").write_text("unrelated")
+    repo("add", "other.txt")
+    repo("commit", "-q", "-m", "unrelated")
+    with open("tests/unit/test_old.py", "a") as f:
+        f.write("# edited\n")
+
+    assert sorted(_changed_test_files(Path("tests/unit"))) == ["tests/unit/test_new.py", "tests/unit/test_old.py"]
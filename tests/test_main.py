@@ -0,0 +1,208 @@
+# tests/test_main.py
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from openai import AuthenticationError
+from core.test_generator import test_gen
+import main
+from main import _gather_cancelling, _positive_int, parse_python_file_cached, process_files, run_task_group
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SOURCE = """
+def add(a: int, b: int) -> int:
+    return a + b
+
+class Greeter:
+    def greet(self, name: str) -> str:
+        return f"Hello, {name}"
+
+class MyError(Exception):
+    pass
+"""
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Fixture running in a temporary directory with the prompt templates and one source file"""
+    shutil.copytree(REPO_ROOT / "prompts", tmp_path / "prompts")
+    source_path = tmp_path / "sample.py"
+    source_path.write_text(SOURCE)
+    monkeypatch.chdir(tmp_path)
+    return str(source_path)
+
+@pytest.fixture
+def stub_completion(monkeypatch):
+    """Fixture replacing OpenAI calls with a stream yielding a distinct valid test per request"""
+    counter = itertools.count()
+    calls = []
+
+    async def fake_create_completion(self, **kwargs):
+        calls.append(kwargs)
+        code = f"import pytest\n\ndef test_generated_{next(counter)}():\n    assert 1 == 1\n"
+
+        async def stream():
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=code))])
+        return stream()
+
+    monkeypatch.setattr(test_gen.TestGenerator, "_create_completion", fake_create_completion)
+    return calls
+
+@pytest.mark.parametrize("test_type", ["unit", "integration"])
+def test_methodless_class_does_not_abort_run(workspace, stub_completion, test_type):
+    """Test that an item whose prompt cannot be rendered fails alone while the others are generated"""
+    results = asyncio.run(process_files([workspace], test_type, use_cache=False))
+
+    assert len(results["generated_tests"]) == 2
+    assert len(stub_completion) == 2
+    assert len(results["errors"]) == 1
+    assert "MyError" in results["errors"][0]
+
+@pytest.mark.parametrize("runner", [run_task_group, _gather_cancelling])
+def test_task_group_cancels_siblings_on_auth_error(runner, make_api_error):
+    """Test that an AuthenticationError cancels the sibling tasks and is re-raised unwrapped"""
+    error = make_api_error(AuthenticationError, 401)
+    cancelled = []
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise error
+
+    async def sibling():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(AuthenticationError) as exc_info:
+        asyncio.run(runner([fail(), sibling(), sibling()]))
+    assert exc_info.value is error
+    assert cancelled == [True, True]
+
+def test_auth_error_aborts_run(workspace, monkeypatch, make_api_error):
+    """Test that a rejected API key stops queued requests instead of failing each item"""
+    Path(workspace).write_text("".join(f"def f{i}(x: int) -> int:\n    return x\n\n" for i in range(10)))
+    calls = []
+
+    async def fake_create_completion(self, **kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0)
+        raise make_api_error(AuthenticationError, 401)
+
+    monkeypatch.setattr(test_gen.TestGenerator, "_create_completion", fake_create_completion)
+    results = asyncio.run(process_files([workspace], "unit", max_concurrent=2, use_cache=False))
+
+    assert results["generated_tests"] == []
+    assert results["errors"] == ["Fatal error: HTTP 401"]
+    assert len(calls) == 2
+
+@pytest.mark.parametrize("pack_size", [0, -1])
+def test_non_positive_pack_size_is_rejected(workspace, stub_completion, pack_size):
+    """Test that a pack size below 1 is reported instead of silently sending nothing"""
+    results = asyncio.run(process_files([workspace], "unit", pack_size=pack_size, use_cache=False))
+
+    assert results["generated_tests"] == []
+    assert results["errors"] == [f"Fatal error: pack_size must be at least 1, got {pack_size}"]
+    assert stub_completion == []
+
+def test_response_cache_unavailable_is_not_fatal(workspace, stub_completion, ast_cache_path, monkeypatch, caplog):
+    """Test that a response cache that cannot be opened only disables caching"""
+    def fail_open():
+        raise OSError("read-only file system")
+    monkeypatch.setattr(main, "ResponseCache", fail_open)
+
+    results = asyncio.run(process_files([workspace], "unit"))
+
+    assert len(results["generated_tests"]) == 2
+    assert "Response cache unavailable" in caplog.text
+
+def test_positive_int_argument_type():
+    """Test the CLI type used by --pack-size"""
+    assert _positive_int("3") == 3
+    with pytest.raises(argparse.ArgumentTypeError):
+        _positive_int("0")
+
+def test_batch_mode_submits_one_job(workspace, fake_batch_client):
+    """Test that --batch sends every renderable item in a single Batch API job"""
+    def respond(requests):
+        return [
+            json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": {"choices": [
+                {"message": {"content": f"import pytest\n\ndef test_{index}():\n    assert {index} == {index}\n"}}
+            ]}}})
+            for index, request in enumerate(requests)
+        ]
+    fake_batch_client.respond = respond
+
+    results = asyncio.run(process_files([workspace], "unit", use_cache=False, use_batch_api=True))
+
+    assert sorted(request["custom_id"].split("-", 1)[1] for request in fake_batch_client.submitted) == ["add", "greet"]
+    assert len(results["generated_tests"]) == 2
+    assert len(results["errors"]) == 1 and "MyError" in results["errors"][0]
+
+@pytest.fixture
+def ast_cache_path(tmp_path, monkeypatch):
+    """Fixture pointing the AST cache at a temporary file"""
+    cache_path = tmp_path / "cache" / "ast_cache.sqlite"
+    monkeypatch.setattr(main, "AST_CACHE_PATH", cache_path)
+    return cache_path
+
+def test_ast_cache_hit_skips_parsing(workspace, ast_cache_path, monkeypatch):
+    """Test that a second parse of unchanged content is served from the cache"""
+    first = parse_python_file_cached(workspace)
+    assert ast_cache_path.exists()
+
+    def fail_parse(*args):
+        raise AssertionError("cached content was parsed again")
+    monkeypatch.setattr(main, "parse_python_source", fail_parse)
+
+    assert parse_python_file_cached(workspace) == first
+
+def test_ast_cache_invalidated_by_content_change(workspace, ast_cache_path):
+    """Test that editing the file produces a fresh parse instead of the stale entry"""
+    parse_python_file_cached(workspace)
+    Path(workspace).write_text("def renamed() -> None:\n    pass\n")
+
+    result = parse_python_file_cached(workspace)
+
+    assert [f.name for f in result["functions"]] == ["renamed"]
+    assert result["classes"] == []
+
+def test_ast_cache_unavailable_falls_back_to_parsing(workspace, tmp_path, monkeypatch):
+    """Test that an unusable cache location still yields a parse result"""
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_text("")
+    monkeypatch.setattr(main, "AST_CACHE_PATH", blocker / "ast_cache.sqlite")
+
+    result = parse_python_file_cached(workspace)
+
+    assert [f.name for f in result["functions"]] == ["add"]
+
+def test_identical_prompts_are_sent_once(workspace, stub_completion, tmp_path, caplog):
+    """Test that items sharing a prompt, within and across files, reuse one request"""
+    Path(workspace).write_text(
+        "def add(a: int, b: int) -> int:\n    return a + b\n\n"
+        "class A:\n    def __repr__(self) -> str:\n        return 'A'\n\n"
+        "class B:\n    def __repr__(self) -> str:\n        return 'B'\n"
+    )
+    second_file = tmp_path / "second.py"
+    second_file.write_text("def add(a: int, b: int) -> int:\n    return b + a\n")
+    caplog.set_level(logging.INFO)
+
+    results = asyncio.run(process_files([workspace, str(second_file)], "unit", use_cache=False))
+
+    prompts = [call["messages"][-1]["content"] for call in stub_completion]
+    assert len(prompts) == len(set(prompts)) == 2
+    names = sorted(Path(path).name for path in results["generated_tests"])
+    assert len(names) == 2
+    assert names[0].startswith("test___repr___") and names[1].startswith("test_add_")
+    # The items that reused another item's request are reported as duplicates
+    duplicates = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Skipped duplicate")]
+    assert len(duplicates) == 2
+    assert results["errors"] == []
@@ -0,0 +1,38 @@
+# tests/test_selenium_utils.py
+
+import pytest
+from core.ui_testing import selenium_utils
+from core.ui_testing.selenium_utils import SeleniumTestGenerator
+
+@pytest.fixture
+def fake_chrome(monkeypatch):
+    """Fixture replacing Chrome with a stub that records quit() calls"""
+    class FakeChrome:
+        instances = []
+
+        def __init__(self, options=None):
+            self.quit_called = False
+            FakeChrome.instances.append(self)
+
+        def quit(self):
+            self.quit_called = True
+
+    monkeypatch.setattr(selenium_utils.webdriver, "Chrome", FakeChrome)
+    monkeypatch.setattr(SeleniumTestGenerator, "_driver_singleton", None)
+    monkeypatch.setattr(SeleniumTestGenerator, "_driver_users", 0)
+    return FakeChrome
+
+def test_shared_driver_quits_after_last_user(fake_chrome):
+    """Test that closing one generator leaves the shared driver alive for the others"""
+    first, second = SeleniumTestGenerator(), SeleniumTestGenerator()
+    assert first.initialize_driver() is second.initialize_driver()
+    assert len(fake_chrome.instances) == 1
+
+    first.close()
+    first.close()
+    assert second.driver is not None
+    assert not fake_chrome.instances[0].quit_called
+
+    second.close()
+    assert fake_chrome.instances[0].quit_called
+    assert SeleniumTestGenerator._driver_singleton is None
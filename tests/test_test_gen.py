@@ -0,0 +1,187 @@
+# tests/test_test_gen.py
+
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from core.code_parser.ast_parser import FunctionInfo
+from core.test_generator import test_gen
+from core.test_generator.cache import ResponseCache
+
+@pytest.fixture
+def fake_async_client(monkeypatch):
+    """Fixture providing a stand-in AsyncOpenAI client that records close() calls"""
+    class FakeClient:
+        def __init__(self):
+            self.closed = False
+
+        async def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(test_gen, "_async_client", None)
+    return FakeClient
+
+def test_sync_wrapper_closes_async_client(fake_async_client):
+    """Test that each asyncio.run in a sync wrapper closes the client bound to its loop"""
+    clients = []
+
+    async def use_client():
+        client = fake_async_client()
+        test_gen._async_client = (asyncio.get_running_loop(), client)
+        clients.append(client)
+        return "done"
+
+    assert test_gen._run_with_client(use_client()) == "done"
+    assert test_gen._run_with_client(use_client()) == "done"
+    assert [client.closed for client in clients] == [True, True]
+    assert test_gen._async_client is None
+
+@pytest.fixture
+def recorded_sleeps(monkeypatch):
+    """Fixture replacing asyncio.sleep with a recorder that returns immediately"""
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(test_gen.asyncio, "sleep", fake_sleep)
+    return delays
+
+@pytest.fixture
+def patched_create(monkeypatch):
+    """Fixture routing completions to a callable and counting the attempts"""
+    attempts = []
+
+    def install(behaviour):
+        async def create(**kwargs):
+            attempts.append(kwargs)
+            return behaviour(len(attempts))
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(test_gen, "_get_async_client", lambda: client)
+        return attempts
+    return install
+
+@pytest.mark.parametrize("error_class,status_code", [
+    (test_gen.RateLimitError, 429),
+    (test_gen.InternalServerError, 500),
+    (test_gen.ConflictError, 409),
+    (test_gen.APIConnectionError, None)
+])
+def test_create_completion_retries_transient_errors(tmp_path, recorded_sleeps, patched_create, make_api_error, error_class, status_code):
+    """Test that rate limits, 5xx, conflicts and connection errors are retried with exponential backoff"""
+    def behaviour(attempt):
+        if attempt < 3:
+            if status_code is None:
+                raise error_class(request=None)
+            raise make_api_error(error_class, status_code)
+        return "response"
+    attempts = patched_create(behaviour)
+    generator = test_gen.TestGenerator(output_dir=str(tmp_path))
+
+    assert asyncio.run(generator._create_completion(model="gpt-3.5-turbo")) == "response"
+    assert len(attempts) == 3
+    assert recorded_sleeps == [4.0, 8.0]
+
+def test_create_completion_gives_up_after_max_attempts(tmp_path, recorded_sleeps, patched_create, make_api_error):
+    """Test that the last RateLimitError is re-raised and backoff delays are capped"""
+    def behaviour(attempt):
+        raise make_api_error(test_gen.RateLimitError, 429)
+    attempts = patched_create(behaviour)
+    generator = test_gen.TestGenerator(output_dir=str(tmp_path))
+
+    with pytest.raises(test_gen.RateLimitError):
+        asyncio.run(generator._create_completion(model="gpt-3.5-turbo"))
+    assert len(attempts) == test_gen._MAX_ATTEMPTS
+    assert recorded_sleeps == [4.0, 8.0, 16.0, test_gen._BACKOFF_MAX]
+
+def test_rate_limiter_spaces_requests(monkeypatch, recorded_sleeps):
+    """Test that request starts are spaced 60/rpm seconds apart"""
+    # Patched on the module reference only, so the event loop's own clock is untouched
+    monkeypatch.setattr(test_gen, "time", SimpleNamespace(monotonic=lambda: 100.0))
+    limiter = test_gen.RateLimiter(30)
+
+    async def acquire_three():
+        for _ in range(3):
+            await limiter.acquire()
+    asyncio.run(acquire_three())
+
+    assert recorded_sleeps == [2.0, 4.0]
+
+@pytest.mark.parametrize("requests_per_minute", [0, -5])
+def test_rate_limiter_rejects_non_positive_rate(tmp_path, requests_per_minute):
+    """Test that a zero or negative request rate is rejected instead of disabling the limiter"""
+    with pytest.raises(ValueError):
+        test_gen.TestGenerator(output_dir=str(tmp_path), requests_per_minute=requests_per_minute)
+
+def test_packed_generation_uses_response_cache(tmp_path, patched_create):
+    """Test that packed requests skip cached prompts and cache the valid results they receive"""
+    def behaviour(attempt):
+        # One test per task actually sent in this request
+        task_count = attempts[-1]["messages"][-1]["content"].count("### Task")
+        tests = [{"index": i, "code": f"import pytest\n\ndef test_{attempt}_{i}():\n    assert {i} == {i}\n"} for i in range(task_count)]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"tests": tests})))])
+    attempts = patched_create(behaviour)
+    cache = ResponseCache(tmp_path / "llm_cache.sqlite")
+    generator = test_gen.TestGenerator(output_dir=str(tmp_path / "out"), cache=cache)
+    add, sub, mul = (FunctionInfo(name, (), None, None, 1, 2, False) for name in ("add", "sub", "mul"))
+
+    first = asyncio.run(generator.async_generate_test_cases_packed([add, sub], ["prompt add", "prompt sub"]))
+    second = asyncio.run(generator.async_generate_test_cases_packed([add, mul], ["prompt add", "prompt mul"]))
+    cache.close()
+
+    assert [success for success, _ in first] == [True, True]
+    # The cached add response is replayed (a duplicate of the written test); only mul is sent
+    assert second[0] == (True, None)
+    assert "def test_2_0" in second[1][1]
+    assert len(attempts) == 2
+    assert "prompt add" not in attempts[1]["messages"][-1]["content"]
+
+def _batch_line(request, content, status_code=200):
+    body = {"choices": [{"message": {"content": content}}]}
+    return json.dumps({"custom_id": request["custom_id"], "response": {"status_code": status_code, "body": body}})
+
+def test_batch_api_maps_results_and_tolerates_bad_lines(tmp_path, fake_batch_client):
+    """Test custom_id mapping, cache hits, and that failed or malformed lines only fail their own item"""
+    cache = ResponseCache(tmp_path / "llm_cache.sqlite")
+    cache.set("gpt-3.5-turbo", "prompt mul", "import pytest\n\ndef test_mul():\n    assert 2 * 3 == 6\n")
+    generator = test_gen.TestGenerator(output_dir=str(tmp_path / "out"), cache=cache)
+    infos = [FunctionInfo(name, (), None, None, 1, 2, False) for name in ("add", "sub", "mul", "div")]
+
+    def respond(requests):
+        by_name = {request["custom_id"].split("-", 1)[1]: request for request in requests}
+        # Output order differs from submission order; custom_id maps lines back
+        return [
+            _batch_line(by_name["div"], None),
+            "not json",
+            _batch_line(by_name["sub"], "", status_code=500),
+            _batch_line(by_name["add"], "```python\nimport pytest\n\ndef test_add():\n    assert 1 + 1 == 2\n```"),
+        ]
+    fake_batch_client.respond = respond
+
+    results = generator.generate_test_cases_via_batch_api(infos, [f"prompt {info.name}" for info in infos], poll_interval=0)
+
+    assert sorted(request["custom_id"] for request in fake_batch_client.submitted) == ["0-add", "1-sub", "3-div"]
+    assert results[0][0] and "def test_add" in results[0][1]
+    assert results[1] == (False, None)
+    assert results[2][0] and "def test_mul" in results[2][1]
+    assert results[3] == (False, None)
+    assert "def test_add" in cache.get("gpt-3.5-turbo", "prompt add")
+    cache.close()
+
+@pytest.mark.parametrize("response", [
+    "```python\nimport pytest\n\ndef test_ok():\n    assert 1 == 1\n```",
+    "```\nimport pytest\n\ndef test_ok():\n    assert 1 == 1\n```",
+    "```python3\nimport pytest\n\ndef test_ok():\n    assert 1 == 1\n```",
+    "```python\r\nimport pytest\r\n\r\ndef test_ok():\r\n    assert 1 == 1\r\n```",
+    "<think>Plan the test first.\nThen write it.</think>\n```python\nimport pytest\n\ndef test_ok():\n    assert 1 == 1\n```",
+    "import pytest\n\ndef test_ok():\n    assert 1 == 1",
+])
+def test_finalize_strips_think_blocks_and_fences(tmp_path, response):
+    """Test that reasoning blocks and code fences are removed before validation"""
+    generator = test_gen.TestGenerator(output_dir=str(tmp_path))
+    info = FunctionInfo("ok", (), None, None, 1, 2, False)
+
+    success, test_code = generator._finalize_test_case(info, response)
+
+    assert success
+    assert test_code.replace("\r\n", "\n") == "import pytest\n\ndef test_ok():\n    assert 1 == 1"
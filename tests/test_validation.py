@@ -12,4 +12,26 @@ from core.test_generator.validation import validate_test_case
 ])
 def test_validate_test_case(test_code, expected):
     """Test validation function for generated test cases."""
-    assert validate_test_case(test_code) == expected
\ No newline at end of file
+    assert validate_test_case(test_code) == expected
+
+def test_validate_dependencies_reports_missing_module():
+    """Unresolvable imports are reported without importing anything."""
+    code = "import pytest\nimport not_a_real_module_xyz\n\ndef test_x():\n    assert True"
+    is_valid, messages = validate_test_case(code)
+    assert is_valid is False
+    assert "Missing dependency: not_a_real_module_xyz" in messages
+
+def test_validate_dependencies_does_not_import_packages(tmp_path, monkeypatch):
+    """Test that dotted imports are checked without executing the parent package"""
+    package = tmp_path / "sideeffect_pkg_xyz"
+    package.mkdir()
+    marker = tmp_path / "imported"
+    (package / "__init__.py").write_text(f"open({str(marker)!r}, 'w').close()\n")
+    (package / "sub.py").write_text("value = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    code = "import pytest\nfrom sideeffect_pkg_xyz.sub import value\n\ndef test_x():\n    assert value == 1"
+
+    is_valid, messages = validate_test_case(code)
+
+    assert is_valid, messages
+    assert not marker.exists()